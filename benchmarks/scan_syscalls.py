@@ -0,0 +1,147 @@
+"""Count filesystem calls made while cataloguing a synthetic run tree.
+
+Compares the original listdir/isdir walk used by the sidebar and
+load_image_metadata() with the scandir-based CatalogIndex, on a cold
+index and again on a warm one. Run from the repository root:
+
+    python benchmarks/scan_syscalls.py --jobs 2000 --cases 100
+
+Calls are counted at the Python level (os.listdir, os.scandir, os.stat,
+os.lstat). DirEntry.is_dir() only stats on filesystems that report
+DT_UNKNOWN, which this counter cannot see.
+"""
+import argparse
+import collections
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+logging.disable(logging.WARNING)
+
+import mainApp  # noqa: E402
+
+COUNTED = ("listdir", "scandir", "stat", "lstat")
+
+
+class SyscallCounter:
+    def __init__(self):
+        self.counts = collections.Counter()
+        self._originals = {}
+
+    def __enter__(self):
+        for name in COUNTED:
+            original = getattr(os, name)
+            self._originals[name] = original
+
+            def counted(*args, _name=name, _original=original, **kwargs):
+                self.counts[_name] += 1
+                return _original(*args, **kwargs)
+
+            setattr(os, name, counted)
+        return self
+
+    def __exit__(self, *exc_info):
+        for name, original in self._originals.items():
+            setattr(os, name, original)
+
+
+def build_tree(root, jobs, cases, variables, views, frames):
+    # Many job folders as in a shared run root, one of them populated
+    for j in range(jobs):
+        os.makedirs(os.path.join(root, f"job{j:04d}", "CASES"))
+
+    for c in range(1, cases + 1):
+        case_dir = os.path.join(root, "job0000", "CASES", f"{c:03d}")
+        os.makedirs(os.path.join(case_dir, "system"))
+        for v in range(variables):
+            folder = os.path.join(
+                case_dir, "postProcessing", "images", f"var{v}"
+            )
+            os.makedirs(folder)
+            for view in range(views):
+                for t in range(frames):
+                    name = f"img_var{v}_x_view{view}_{t:06d}.png"
+                    open(os.path.join(folder, name), "wb").close()
+
+
+def legacy_walk(base):
+    # One sidebar pass plus load_image_metadata() for every variable
+    sorted(
+        d for d in os.listdir(base) if os.path.isdir(os.path.join(base, d))
+    )
+    cases_root = os.path.join(base, "job0000", "CASES")
+    cases = sorted(
+        d for d in os.listdir(cases_root)
+        if os.path.isdir(os.path.join(cases_root, d))
+        and d.isdigit() and len(d) == 3
+    )
+    images = os.path.join(cases_root, cases[0], "postProcessing", "images")
+    variables = sorted(
+        d for d in os.listdir(images)
+        if os.path.isdir(os.path.join(images, d))
+    )
+    for variable in variables:
+        for case in cases:
+            path = os.path.join(
+                cases_root, case, "postProcessing", "images", variable
+            )
+            if not os.path.exists(path):
+                continue
+            for f in os.listdir(path):
+                if f.lower().endswith(mainApp.IMAGE_EXTENSIONS):
+                    mainApp.parse_metadata(f)
+                    os.path.join(path, f)
+
+
+def indexed_walk(index, base):
+    index.subdirs(base)
+    cases_root = os.path.join(base, "job0000", "CASES")
+    cases = [
+        d for d in index.subdirs(cases_root)
+        if d.isdigit() and len(d) == 3
+    ]
+    images = os.path.join(cases_root, cases[0], "postProcessing", "images")
+    for variable in index.subdirs(images):
+        for case in cases:
+            index.frames(os.path.join(
+                cases_root, case, "postProcessing", "images", variable
+            ))
+
+
+def measure(label, fn, *args):
+    with SyscallCounter() as counter:
+        start = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - start
+    detail = ", ".join(f"{name}={counter.counts[name]}" for name in COUNTED)
+    total = sum(counter.counts.values())
+    print(f"{label:<16} {total:>8} calls  ({detail})  {elapsed:.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--cases", type=int, default=40)
+    parser.add_argument("--variables", type=int, default=5)
+    parser.add_argument("--views", type=int, default=4)
+    parser.add_argument("--frames", type=int, default=25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        base = os.path.join(root, "run")
+        build_tree(
+            base, args.jobs, args.cases, args.variables,
+            args.views, args.frames,
+        )
+        index = mainApp.CatalogIndex(os.path.join(root, "index.sqlite"))
+
+        measure("listdir/isdir", legacy_walk, base)
+        measure("scandir (cold)", indexed_walk, index, base)
+        measure("scandir (warm)", indexed_walk, index, base)
+
+
+if __name__ == "__main__":
+    main()
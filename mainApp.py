@@ -2,9 +2,27 @@ import streamlit as st
 import os
 import re
 import numpy as np
-from PIL import Image
+from PIL import Image, ImageDraw
 import io
+import csv
 import math
+import operator
+import sys
+import hashlib
+import functools
+import json
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
 
 # ---------------- CONFIG ----------------
 st.set_page_config(layout="wide", page_title="CFD Case Viewer")
@@ -12,6 +30,76 @@ st.set_page_config(layout="wide", page_title="CFD Case Viewer")
 OPENFOAM_BASE_DIR = "/home/openfoam/openFoam/run"
 MAX_DISPLAY_WIDTH = 1200
 Image.MAX_IMAGE_PIXELS = None
+# Hard ceiling on the pixel buffers held by any single decode.
+DECODE_MEMORY_LIMIT = 512 * 1024 * 1024
+
+# Local scratch space for derived artefacts (never the NFS run tree).
+CACHE_ROOT = os.path.join(os.path.expanduser("~"), ".cache", "caseViewer")
+# Persistent index of run directories and frame files.
+INDEX_PATH = os.path.join(CACHE_ROOT, "index.sqlite")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+# Optional solver-written frame lists in postProcessing/images, with
+# variable, view, time (or iteration) and filename per row.
+MANIFEST_NAMES = ("manifest.json", "manifest.csv")
+# Parsed manifests kept in memory, bounded by their total row count.
+MANIFEST_CACHE_ROWS = 200_000
+# Read width/height/mode from each new frame's header while indexing.
+# Costs one small read per file; manifests may carry these columns instead.
+PROBE_IMAGE_HEADERS = False
+# Job/case/variable listings are shared across sessions for this long.
+LISTING_TTL_SECONDS = 30
+# Filename templates tried in order before the built-in heuristic (view =
+# 4th underscore token, sort key = first 6-digit run or last number).
+# Fields: {view}, {variable}, {time} (float), {iteration} (int) and {_}
+# for an ignored token, e.g. "{_}_{variable}_{_}_{view}_t{time}".
+FILENAME_SCHEMAS = []
+# inotify does not see writes made by other NFS clients (e.g. solver nodes);
+# polling does, at the cost of periodic stats.
+WATCH_USE_POLLING = False
+LIVE_POLL_SECONDS = 3
+# Case folders listed concurrently on a metadata cache miss.
+METADATA_SCAN_WORKERS = 16
+METADATA_CACHE_ENTRIES = 4096
+# Resized previews, content-addressed; set to None to disable.
+PREVIEW_CACHE_DIR = os.path.join(CACHE_ROOT, "previews")
+# Disk caches are trimmed least recently used first once over their cap,
+# checked at most once per CACHE_PRUNE_SECONDS.
+PREVIEW_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+CACHE_PRUNE_SECONDS = 300
+# Packed per (case, variable, view) frame stacks for memory-mapped scrubbing.
+FRAME_STACK_DIR = os.path.join(CACHE_ROOT, "stacks")
+FRAME_STACK_MAX_BYTES = 8 * 1024 * 1024 * 1024
+# Lazily built multi-resolution tiles for the native-resolution inspector.
+TILE_CACHE_DIR = os.path.join(CACHE_ROOT, "tiles")
+TILE_SIZE = 512
+TILE_CACHE_MAX_BYTES = 4 * 1024 * 1024 * 1024
+INSPECTOR_VIEWPORT = (1200, 800)
+# Decoded frames shared by every session in this server process.
+FRAME_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Bytes sent to the browser. st.image passes JPEG and PNG through as-is
+# and re-encodes anything else, so only those two are useful here.
+DISPLAY_FORMAT = "JPEG"
+DISPLAY_QUALITY = 85
+ENCODED_CACHE_MAX_BYTES = 128 * 1024 * 1024
+# Per-image downloads are encoded only when their button is clicked.
+DOWNLOAD_FORMAT = "PNG"
+# Combined grid export: "letterbox" keeps tile aspect ratios inside the
+# largest tile's cell, "stretch" resizes every tile to fill it.
+GRID_FIT = "letterbox"
+GRID_EXPORT_FORMAT = "PNG"
+GRID_BACKGROUND = (20, 20, 20)
+# Blink GIFs are downscaled to at most this width.
+BLINK_GIF_WIDTH = 600
+# Blink GIF palettes are fitted on at most this many sampled pixels.
+BLINK_PALETTE_SAMPLES = 1 << 16
+BLINK_GIF_DURATION = 400
+# Generated blink GIFs, shared by every session in this server process.
+ARTEFACT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Upper bound on concurrent decodes across all sessions (PIL drops the GIL).
+DECODE_WORKERS = 8
+# Frames either side of the slider position to decode in the background.
+PREFETCH_RADIUS = 3
+PREFETCH_WORKERS = 1
 
 # ---------------- SESSION STATE ----------------
 if "data_loaded" not in st.session_state:
@@ -20,134 +108,2009 @@ if "data_loaded" not in st.session_state:
 if "active_blink_case" not in st.session_state:
     st.session_state.active_blink_case = None
 
-# Blink image cache for instant switching
-if "blink_cache" not in st.session_state:
-    st.session_state.blink_cache = {}
+# Cancellation token of this session's pending prefetch job
+if "prefetch_cancel" not in st.session_state:
+    st.session_state.prefetch_cancel = None
 
 
 def reset_state():
     st.session_state.data_loaded = False
     st.session_state.active_blink_case = None
-    st.session_state.blink_cache = {}
+    if st.session_state.prefetch_cancel is not None:
+        st.session_state.prefetch_cancel.set()
 
 
 # ---------------- METADATA PARSER ----------------
-def parse_metadata(filename):
-    name_no_ext = os.path.splitext(filename)[0]
-    parts = name_no_ext.split("_")
-    metadata = {"view": "Default", "sort_key": 0}
+class FilenameSchema:
+    """A filename template compiled once into a single anchored regex."""
+
+    FIELD_PATTERNS = {
+        "view": r"(?P<view>[^_]+)",
+        "variable": r"(?P<variable>[^_]+)",
+        "time": r"(?P<time>[-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)",
+        "iteration": r"(?P<iteration>\d+)",
+        "_": r"[^_]+",
+    }
+    FIELD_RE = re.compile(r"\{(\w+)\}")
+
+    def __init__(self, template):
+        self.template = template
+        pattern, position, seen = [], 0, set()
+        for match in self.FIELD_RE.finditer(template):
+            if match.group(1) not in self.FIELD_PATTERNS:
+                raise ValueError(
+                    f"Unknown field {match.group(0)} in schema {template!r}"
+                )
+            # "{_}" is a wildcard; named fields become regex groups
+            if match.group(1) != "_" and match.group(1) in seen:
+                raise ValueError(
+                    f"Repeated field {match.group(0)} in schema {template!r}"
+                )
+            seen.add(match.group(1))
+            pattern.append(re.escape(template[position:match.start()]))
+            pattern.append(self.FIELD_PATTERNS[match.group(1)])
+            position = match.end()
+        pattern.append(re.escape(template[position:]))
+        self.regex = re.compile("".join(pattern) + r"\Z")
+
+    def parse(self, stem):
+        match = self.regex.match(stem)
+        if match is None:
+            return None
+
+        fields = match.groupdict()
+        if fields.get("time") is not None:
+            sort_key = float(fields["time"])
+        elif fields.get("iteration") is not None:
+            sort_key = int(fields["iteration"])
+        else:
+            sort_key = 0
+        return fields.get("view") or "Default", sort_key
+
 
-    metadata["view"] = parts[3] if len(parts) > 3 else parts[-1]
+COMPILED_SCHEMAS = [FilenameSchema(t) for t in FILENAME_SCHEMAS]
+SIX_DIGITS_RE = re.compile(r"\d{6}")
+NUMBER_RE = re.compile(r"\d+")
 
-    match = re.search(r"(\d{6})", name_no_ext)
+
+def _parse_stem(stem):
+    for schema in COMPILED_SCHEMAS:
+        parsed = schema.parse(stem)
+        if parsed is not None:
+            return parsed
+
+    parts = stem.split("_")
+    view = parts[3] if len(parts) > 3 else parts[-1]
+
+    match = SIX_DIGITS_RE.search(stem)
     if match:
-        metadata["sort_key"] = int(match.group(1))
-    else:
-        nums = re.findall(r"\d+", name_no_ext)
-        if nums:
-            metadata["sort_key"] = int(nums[-1])
+        return view, int(match.group(0))
+
+    nums = NUMBER_RE.findall(stem)
+    return view, int(nums[-1]) if nums else 0
 
-    return metadata
+
+def parse_filenames(filenames):
+    """Parse a whole directory listing into (view, sort_key) pairs."""
+    return [_parse_stem(os.path.splitext(f)[0]) for f in filenames]
+
+
+def parse_metadata(filename):
+    view, sort_key = _parse_stem(os.path.splitext(filename)[0])
+    return {"view": view, "sort_key": sort_key}
+
+
+def index_signature():
+    # Stored with the catalog index so a parser change re-indexes frames
+    probe = "probe" if PROBE_IMAGE_HEADERS else "no-probe"
+    return "|".join([probe, "default"] + FILENAME_SCHEMAS)
+
+
+def probe_image_header(path):
+    # PIL only parses the header here; pixels are decoded on load()
+    try:
+        with Image.open(path) as img:
+            return img.width, img.height, img.mode
+    except (OSError, ValueError):
+        return None, None, None
+
+
+# ---------------- DIRECTORY SCANNER ----------------
+def scan_directory(path):
+    """List a directory once, split into subdirectories and frame files.
+
+    DirEntry.is_dir() is answered from the d_type returned by readdir, so
+    no per-entry stat is issued except for symlinks or filesystems that
+    report DT_UNKNOWN (where the entry caches its own stat result).
+    """
+    subdirs, frames = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                subdirs.append(entry.name)
+            elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                frames.append(entry.name)
+    return subdirs, frames
+
+
+# ---------------- FRAME MANIFESTS ----------------
+def read_manifest(manifest_path):
+    """Group manifest rows by variable as frame index rows.
+
+    Each row is (name, view, sort_key, width, height, mode); the last
+    three come from optional columns. JSON manifests are a list of records
+    or {"frames": [...]}; CSV ones need a header row. Returns None for an
+    unreadable or malformed file.
+    """
+    try:
+        with open(manifest_path, "r", encoding="utf-8", newline="") as handle:
+            if manifest_path.endswith(".json"):
+                records = json.load(handle)
+                if isinstance(records, dict):
+                    records = records["frames"]
+            else:
+                records = list(csv.DictReader(handle))
+
+        by_variable = {}
+        for record in records:
+            name = os.path.basename(record["filename"])
+            view = record.get("view") or None
+
+            if record.get("time") not in (None, ""):
+                sort_key = float(record["time"])
+            elif record.get("iteration") not in (None, ""):
+                sort_key = int(record["iteration"])
+            else:
+                sort_key = None
+
+            # The filename is only parsed for columns the manifest lacks
+            if view is None or sort_key is None:
+                parsed_view, parsed_key = _parse_stem(
+                    os.path.splitext(name)[0]
+                )
+                view = view or parsed_view
+                sort_key = parsed_key if sort_key is None else sort_key
+
+            header = [
+                int(record[field]) if record.get(field) not in (None, "")
+                else None
+                for field in ("width", "height")
+            ]
+            by_variable.setdefault(str(record["variable"]), []).append((
+                name, view, sort_key,
+                *header, record.get("mode") or None,
+            ))
+        return by_variable
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+# ---------------- CATALOG INDEX ----------------
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    manifest_mtime_ns INTEGER
+);
+CREATE TABLE IF NOT EXISTS subdirs (
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (parent, name)
+);
+CREATE TABLE IF NOT EXISTS frames (
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    view TEXT NOT NULL,
+    sort_key NUMERIC NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    mode TEXT,
+    PRIMARY KEY (dir, name)
+);
+CREATE INDEX IF NOT EXISTS frames_by_view ON frames (dir, view, sort_key);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+FRAME_HEADER_COLUMNS = (
+    ("width", "INTEGER"), ("height", "INTEGER"), ("mode", "TEXT"),
+)
+LISTING_MANIFEST_COLUMNS = (("manifest_mtime_ns", "INTEGER"),)
+INSERT_FRAME_SQL = (
+    "INSERT OR REPLACE INTO frames "
+    "(dir, name, view, sort_key, width, height, mode) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _manifest_size(entry):
+    _, by_variable = entry
+    if by_variable is None:
+        return 1
+    return 1 + sum(len(rows) for rows in by_variable.values())
+
+
+class CatalogIndex:
+    """Persistent SQLite index of directory listings, refreshed by mtime.
+
+    Each directory is scanned in a single pass that records both its
+    subdirectories (jobs, cases, variables) and its parsed frame files.
+    A directory is only re-scanned when its mtime changes, and frame rows
+    are then patched incrementally. When the images folder holds a
+    manifest at least as new as the variable folder, its rows are used
+    instead of listing and parsing the folder.
+    """
+
+    def __init__(self, db_path, signature=""):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._manifests = SharedLRUCache(
+            MANIFEST_CACHE_ROWS, sizeof=_manifest_size
+        )
+        self._manifest_dirs = {}
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(INDEX_SCHEMA)
+
+            # Indexes created before header probing or manifest tracking
+            # lack these columns
+            for table, added_columns in (
+                ("frames", FRAME_HEADER_COLUMNS),
+                ("listings", LISTING_MANIFEST_COLUMNS),
+            ):
+                columns = {
+                    row[1] for row in
+                    self._conn.execute(f"PRAGMA table_info({table})")
+                }
+                for column, kind in added_columns:
+                    if column not in columns:
+                        self._conn.execute(
+                            f"ALTER TABLE {table} ADD COLUMN {column} {kind}"
+                        )
+
+            # Frames parsed under a different filename schema are stale
+            row = self._conn.execute(
+                "SELECT value FROM settings WHERE key = 'signature'"
+            ).fetchone()
+            if row is None or row[0] != signature:
+                self._conn.execute("DELETE FROM frames")
+                self._conn.execute("DELETE FROM listings")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO settings (key, value) "
+                    "VALUES ('signature', ?)",
+                    (signature,),
+                )
+
+    def _is_fresh(self, path, mtime_ns, manifest_mtime_ns):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime_ns, manifest_mtime_ns FROM listings "
+                "WHERE path = ?",
+                (path,),
+            ).fetchone()
+        return row is not None and tuple(row) == (mtime_ns, manifest_mtime_ns)
+
+    def _mark_indexed(self, path, mtime_ns, manifest_mtime_ns):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO listings "
+            "(path, mtime_ns, manifest_mtime_ns) VALUES (?, ?, ?)",
+            (path, mtime_ns, manifest_mtime_ns),
+        )
+
+    def _find_manifest(self, images_dir):
+        # Adding or removing a manifest bumps the images dir mtime, so the
+        # manifest names are only probed again after it changes
+        try:
+            dir_mtime_ns = os.stat(images_dir).st_mtime_ns
+        except OSError:
+            return None
+
+        with self._lock:
+            cached = self._manifest_dirs.get(images_dir)
+        if cached is not None and cached[0] == dir_mtime_ns:
+            return cached[1]
+
+        found = None
+        for manifest_name in MANIFEST_NAMES:
+            manifest_path = os.path.join(images_dir, manifest_name)
+            if os.path.isfile(manifest_path):
+                found = manifest_path
+                break
+
+        with self._lock:
+            self._manifest_dirs[images_dir] = (dir_mtime_ns, found)
+        return found
+
+    def _manifest_state(self, key):
+        """(path, mtime_ns) of the manifest covering a folder, or Nones."""
+        images_dir = os.path.dirname(key)
+        parent, images_name = os.path.split(images_dir)
+        # Only variable folders under postProcessing/images have manifests
+        if images_name != "images" or os.path.basename(parent) != (
+            "postProcessing"
+        ):
+            return None, None
+
+        # A known manifest is stat'ed directly, which also catches a
+        # rewrite in place that leaves the images dir mtime unchanged
+        with self._lock:
+            cached = self._manifest_dirs.get(images_dir)
+        manifest_path = cached[1] if cached is not None else None
+        if manifest_path is None:
+            manifest_path = self._find_manifest(images_dir)
+        if manifest_path is None:
+            return None, None
+
+        try:
+            return manifest_path, os.stat(manifest_path).st_mtime_ns
+        except OSError:
+            with self._lock:
+                self._manifest_dirs.pop(images_dir, None)
+            return None, None
+
+    def _manifest_rows(self, key, mtime_ns, manifest_path, manifest_mtime_ns):
+        # Frames written after the manifest make it stale
+        if manifest_path is None or manifest_mtime_ns < mtime_ns:
+            return None
+
+        cached = self._manifests.get(manifest_path)
+        if cached is None or cached[0] != manifest_mtime_ns:
+            cached = self._manifests.put(
+                manifest_path,
+                (manifest_mtime_ns, read_manifest(manifest_path)),
+            )
+
+        if cached[1] is None:
+            return None
+        return cached[1].get(os.path.basename(key))
+
+    def _refresh(self, path):
+        key = os.path.abspath(path)
+        mtime_ns = os.stat(path).st_mtime_ns
+        # A manifest rewritten after its frames leaves the folder mtime
+        # alone, so its own mtime is part of the freshness check
+        manifest_path, manifest_mtime_ns = self._manifest_state(key)
+        if self._is_fresh(key, mtime_ns, manifest_mtime_ns):
+            return key
+
+        manifest_rows = self._manifest_rows(
+            key, mtime_ns, manifest_path, manifest_mtime_ns
+        )
+        if manifest_rows is not None:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "DELETE FROM subdirs WHERE parent = ?", (key,)
+                )
+                self._conn.execute("DELETE FROM frames WHERE dir = ?", (key,))
+                self._conn.executemany(
+                    INSERT_FRAME_SQL, [(key, *row) for row in manifest_rows]
+                )
+                self._mark_indexed(key, mtime_ns, manifest_mtime_ns)
+            return key
+
+        subdirs, frames = scan_directory(path)
+        names = set(frames)
+        with self._lock:
+            known = {
+                row[0] for row in self._conn.execute(
+                    "SELECT name FROM frames WHERE dir = ?", (key,)
+                )
+            }
+
+        # Only files that appeared since the last refresh are parsed
+        new_names = sorted(names - known)
+        added = []
+        for name, (view, sort_key) in zip(
+            new_names, parse_filenames(new_names)
+        ):
+            header = (None, None, None)
+            if PROBE_IMAGE_HEADERS:
+                header = probe_image_header(os.path.join(path, name))
+            added.append((key, name, view, sort_key, *header))
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM subdirs WHERE parent = ?", (key,))
+            self._conn.executemany(
+                "INSERT INTO subdirs (parent, name) VALUES (?, ?)",
+                [(key, name) for name in subdirs],
+            )
+            self._conn.executemany(
+                "DELETE FROM frames WHERE dir = ? AND name = ?",
+                [(key, name) for name in known - names],
+            )
+            self._conn.executemany(INSERT_FRAME_SQL, added)
+            self._mark_indexed(key, mtime_ns, manifest_mtime_ns)
+        return key
+
+    def subdirs(self, path):
+        key = self._refresh(path)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name FROM subdirs WHERE parent = ? ORDER BY name",
+                (key,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def frames(self, path):
+        key = self._refresh(path)
+        with self._lock:
+            return self._conn.execute(
+                "SELECT view, sort_key, name FROM frames WHERE dir = ? "
+                "ORDER BY view, sort_key, name",
+                (key,),
+            ).fetchall()
+
+    def views(self, path):
+        key = self._refresh(path)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT view FROM frames WHERE dir = ? ORDER BY view",
+                (key,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def view_frames(self, path, view):
+        # No refresh: callers hold a views() snapshot of this directory
+        with self._lock:
+            return self._conn.execute(
+                "SELECT sort_key, name, width, height, mode FROM frames "
+                "WHERE dir = ? AND view = ? ORDER BY sort_key, name",
+                (os.path.abspath(path), view),
+            ).fetchall()
+
+
+@st.cache_resource(show_spinner=False)
+def get_catalog_index():
+    return CatalogIndex(INDEX_PATH, index_signature())
+
+
+# ---------------- SIDEBAR LISTINGS ----------------
+# Shared by all sessions; on expiry the index only re-lists a directory
+# whose mtime changed, so a refresh normally costs one stat.
+@st.cache_data(show_spinner=False, ttl=LISTING_TTL_SECONDS)
+def list_jobs(base_path):
+    return get_catalog_index().subdirs(base_path)
+
+
+@st.cache_data(show_spinner=False, ttl=LISTING_TTL_SECONDS)
+def list_cases(cases_root_path):
+    return [
+        d for d in get_catalog_index().subdirs(cases_root_path)
+        if d.isdigit() and len(d) == 3
+    ]
+
+
+@st.cache_data(show_spinner=False, ttl=LISTING_TTL_SECONDS)
+def list_variables(img_path):
+    return get_catalog_index().subdirs(img_path)
+
+
+def refresh_listings():
+    list_jobs.clear()
+    list_cases.clear()
+    list_variables.clear()
+
+
+# ---------------- METADATA WATCHER ----------------
+class _GenerationBumper(FileSystemEventHandler):
+    def __init__(self, watcher):
+        super().__init__()
+        self._watcher = watcher
+
+    def on_any_event(self, event):
+        if event.event_type in ("opened", "closed_no_write"):
+            return
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path:
+                self._watcher.bump(os.path.dirname(path))
+                if event.is_directory:
+                    self._watcher.bump(path)
+                elif os.path.basename(path) in MANIFEST_NAMES:
+                    self._watcher.bump_manifest(os.path.dirname(path))
+
+
+class MetadataWatcher:
+    """Tracks a generation counter per watched image directory.
+
+    Each selected case's postProcessing/images tree is watched once; any
+    file event bumps the counter of the variable folder it happened in,
+    which invalidates just that (case, variable) metadata cache entry.
+    """
+
+    def __init__(self):
+        self._generations = {}
+        self._manifest_generations = {}
+        self._watched = set()
+        self._lock = threading.Lock()
+        self._handler = _GenerationBumper(self)
+        self._observer = PollingObserver() if WATCH_USE_POLLING else Observer()
+        self._observer.daemon = True
+        self._observer.start()
+
+    def bump(self, path):
+        path = os.path.abspath(path)
+        with self._lock:
+            self._generations[path] = self._generations.get(path, 0) + 1
+
+    def bump_manifest(self, images_dir):
+        # A manifest covers every variable folder of its images dir
+        images_dir = os.path.abspath(images_dir)
+        with self._lock:
+            self._manifest_generations[images_dir] = (
+                self._manifest_generations.get(images_dir, 0) + 1
+            )
+
+    def generation(self, path):
+        path = os.path.abspath(path)
+        with self._lock:
+            return self._generations.get(path, 0) + (
+                self._manifest_generations.get(os.path.dirname(path), 0)
+            )
+
+    def watch(self, images_dir):
+        images_dir = os.path.abspath(images_dir)
+        with self._lock:
+            if images_dir in self._watched:
+                return
+            self._watched.add(images_dir)
+
+        try:
+            self._observer.schedule(self._handler, images_dir, recursive=True)
+        except OSError:
+            # Missing tree or exhausted inotify watches: metadata for this
+            # case is then only refreshed when the cache is cleared.
+            with self._lock:
+                self._watched.discard(images_dir)
+
+
+@st.cache_resource(show_spinner=False)
+def get_metadata_watcher():
+    return MetadataWatcher()
+
+
+@st.fragment(run_every=LIVE_POLL_SECONDS)
+def follow_live_run(image_dirs, generations):
+    watcher = get_metadata_watcher()
+    if [watcher.generation(path) for path in image_dirs] != generations:
+        st.rerun()
 
 
 # ---------------- LOAD IMAGE METADATA ONLY ----------------
-@st.cache_data(show_spinner=False)
-def load_image_metadata(root_dir, selected_cases, variable_folder):
-    dataset = {}
+def case_image_dir(root_dir, case, variable_folder):
+    return os.path.join(
+        root_dir, case, "postProcessing", "images", variable_folder
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_scan_pool():
+    return ThreadPoolExecutor(
+        max_workers=METADATA_SCAN_WORKERS, thread_name_prefix="scan"
+    )
+
+
+class FrameList(Sequence):
+    """Columnar, sorted frame list of one view.
+
+    The directory is stored once (interned), sort keys as a NumPy array
+    and file names as one string blob with end offsets, instead of a list
+    of (sort_key, full_path) tuples repeating the root path per frame.
+    Indexing still yields (sort_key, full_path) tuples. Probed header
+    sizes are kept as parallel arrays, with -1 where unknown.
+    """
+
+    def __init__(self, directory, rows):
+        self.directory = sys.intern(directory)
+
+        keys = [row[0] for row in rows]
+        dtype = np.int64 if all(isinstance(k, int) for k in keys) else np.float64
+        self.keys = np.array(keys, dtype=dtype)
 
+        names = [row[1] for row in rows]
+        self._names = "".join(names)
+        self._ends = np.cumsum([len(name) for name in names], dtype=np.int64)
+
+        self.widths = np.array(
+            [row[2] if row[2] is not None else -1 for row in rows],
+            dtype=np.int32,
+        )
+        self.heights = np.array(
+            [row[3] if row[3] is not None else -1 for row in rows],
+            dtype=np.int32,
+        )
+        self.modes = [row[4] for row in rows]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def name(self, i):
+        start = int(self._ends[i - 1]) if i > 0 else 0
+        return self._names[start:int(self._ends[i])]
+
+    def frame_info(self, i):
+        """(width, height, mode) from the header index, or None."""
+        if self.widths[i] < 0:
+            return None
+        return int(self.widths[i]), int(self.heights[i]), self.modes[i]
+
+    def __getitem__(self, i):
+        i = operator.index(i)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.keys[i].item(), os.path.join(self.directory, self.name(i))
+
+
+class CaseFrames(Mapping):
+    """Views of one case/variable folder, with frame lists built lazily.
+
+    Only the set of views is read up front; the sorted FrameList of a
+    view is materialised the first time that view is indexed.
+    """
+
+    def __init__(self, path, views, index):
+        self.path = path
+        self._views = tuple(views)
+        self._index = index
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        return iter(self._views)
+
+    def __len__(self):
+        return len(self._views)
+
+    def __contains__(self, view):
+        return view in self._views
+
+    def __getitem__(self, view):
+        if view not in self._views:
+            raise KeyError(view)
+
+        with self._lock:
+            frames = self._frames.get(view)
+        if frames is None:
+            frames = FrameList(
+                self.path, self._index.view_frames(self.path, view)
+            )
+            with self._lock:
+                self._frames[view] = frames
+        return frames
+
+
+def scan_case_metadata(path, index):
+    return CaseFrames(path, index.views(path), index)
+
+
+def load_image_metadata(root_dir, selected_cases, variable_folder):
+    watcher = get_metadata_watcher()
+    cache = get_metadata_cache()
+    index = get_catalog_index()
+    pool = get_scan_pool()
+
+    # Entries are keyed by the watcher generation, so a file event only
+    # invalidates its own (case, variable) folder. Misses are scanned
+    # concurrently: latency follows the slowest folder, not the sum.
+    found, pending = {}, {}
     for case in selected_cases:
-        path = os.path.join(
-            root_dir, case, "postProcessing", "images", variable_folder
+        path = case_image_dir(root_dir, case, variable_folder)
+        watcher.watch(os.path.dirname(path))
+
+        key = (os.path.abspath(path), watcher.generation(path))
+        views = cache.get(key)
+        if views is not None:
+            found[case] = views
+        else:
+            pending[case] = (
+                key, pool.submit(scan_case_metadata, path, index)
+            )
+
+    for case, (key, future) in pending.items():
+        try:
+            found[case] = cache.put(key, future.result())
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+
+    return {case: found[case] for case in selected_cases if case in found}
+
+
+# ---------------- DISK CACHE LIMITS ----------------
+def touch_cache_file(path):
+    # Hits refresh the mtime, which pruning treats as the last use
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def remove_quietly(path):
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
+
+
+def write_atomically(path, write):
+    """Call write(tmp_path), then rename the result over path.
+
+    Readers never see a partial file, and the temp name includes the
+    thread because every session shares this process.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        remove_quietly(tmp_path)
+        raise
+
+
+def prune_cache_dir(root, max_bytes):
+    """Delete the least recently used files under root beyond max_bytes."""
+    entries, total = [], 0
+    stale_tmp = time.time() - CACHE_PRUNE_SECONDS
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            if name.endswith(".tmp"):
+                # Leftovers of interrupted writes; fresh ones are in flight
+                if stat.st_mtime < stale_tmp:
+                    remove_quietly(path)
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+            total += stat.st_size
+
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        if remove_quietly(path):
+            total -= size
+
+
+class DiskCachePruner:
+    """Rate-limited pruning of the disk caches, shared by every session.
+
+    Walks run one at a time on a single background thread, at most once
+    per CACHE_PRUNE_SECONDS for each cache directory.
+    """
+
+    def __init__(self):
+        self._last_pruned = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="prune"
+        )
+
+    def schedule(self, root, max_bytes):
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_pruned.get(root)
+            if last is not None and now - last < CACHE_PRUNE_SECONDS:
+                return
+            self._last_pruned[root] = now
+        self._pool.submit(prune_cache_dir, root, max_bytes)
+
+
+@st.cache_resource(show_spinner=False)
+def get_disk_pruner():
+    return DiskCachePruner()
+
+
+def prune_disk_caches():
+    # Called on every rerun; the pruner makes all but the first per
+    # interval a no-op
+    pruner = get_disk_pruner()
+    for root, max_bytes in (
+        (PREVIEW_CACHE_DIR, PREVIEW_CACHE_MAX_BYTES),
+        (TILE_CACHE_DIR, TILE_CACHE_MAX_BYTES),
+        (FRAME_STACK_DIR, FRAME_STACK_MAX_BYTES),
+    ):
+        if root is not None:
+            pruner.schedule(root, max_bytes)
+
+
+# ---------------- PREVIEW DISK CACHE ----------------
+def preview_cache_path(path, stat, max_width):
+    key = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{max_width}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return os.path.join(PREVIEW_CACHE_DIR, digest[:2], f"{digest}.png")
+
+
+def read_cached_preview(cache_path):
+    try:
+        with Image.open(cache_path) as img:
+            array = np.array(img.convert("RGB"))
+    except (OSError, ValueError):
+        return None
+    touch_cache_file(cache_path)
+    return array
+
+
+def write_cached_preview(cache_path, array):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        write_atomically(
+            cache_path,
+            lambda tmp_path: Image.fromarray(array).save(
+                tmp_path, format="PNG", compress_level=1
+            ),
         )
-        if not os.path.exists(path):
+    except OSError:
+        pass
+
+
+# ---------------- SHARED CACHES ----------------
+def _entry_size(value):
+    return value.nbytes if isinstance(value, np.ndarray) else len(value)
+
+
+class SharedLRUCache:
+    """Thread-safe LRU bounded by the total size of its entries.
+
+    Sizes come from `sizeof` (array or byte length by default), so the
+    same class bounds decoded frames by bytes or metadata by entry count.
+    """
+
+    def __init__(self, max_bytes, sizeof=_entry_size):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._sizeof = sizeof
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= self._sizeof(previous)
+
+            self._entries[key] = value
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= self._sizeof(evicted)
+
+        return value
+
+
+@st.cache_resource(show_spinner=False)
+def get_frame_cache():
+    return SharedLRUCache(FRAME_CACHE_MAX_BYTES)
+
+
+@st.cache_resource(show_spinner=False)
+def get_encoded_cache():
+    return SharedLRUCache(ENCODED_CACHE_MAX_BYTES)
+
+
+@st.cache_resource(show_spinner=False)
+def get_artefact_cache():
+    return SharedLRUCache(ARTEFACT_CACHE_MAX_BYTES)
+
+
+@st.cache_resource(show_spinner=False)
+def get_metadata_cache():
+    return SharedLRUCache(METADATA_CACHE_ENTRIES, sizeof=lambda views: 1)
+
+
+# ---------------- MEMORY-MAPPED FRAME STACKS ----------------
+def frame_stack_prefix(image_dir, max_width):
+    key = f"{os.path.abspath(image_dir)}|{max_width}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def frame_stack_index_path(image_dir, view, max_width):
+    # Stacks of one folder share a prefix, so readers can find a frame's
+    # stack from its folder and name alone, whatever view it was packed as
+    view_digest = hashlib.sha1(view.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(
+        FRAME_STACK_DIR,
+        f"{frame_stack_prefix(image_dir, max_width)}.{view_digest}.json",
+    )
+
+
+class FrameStackRegistry:
+    """Thread-safe map of open stack indexes and their memory maps.
+
+    Publishing a stack renames its index into FRAME_STACK_DIR, which bumps
+    the directory mtime, so that one stat tells whether any stack changed.
+    """
+
+    def __init__(self):
+        self._generation = None
+        self._by_prefix = {}
+        self._stacks = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            generation = os.stat(FRAME_STACK_DIR).st_mtime_ns
+        except OSError:
+            return False
+
+        with self._lock:
+            if generation == self._generation:
+                return True
+
+        by_prefix = {}
+        for name in os.listdir(FRAME_STACK_DIR):
+            if name.endswith(".json"):
+                prefix = name.split(".", 1)[0]
+                by_prefix.setdefault(prefix, []).append(
+                    os.path.join(FRAME_STACK_DIR, name)
+                )
+
+        with self._lock:
+            # Rebuilt stacks are simply reopened on their next lookup
+            self._generation = generation
+            self._by_prefix = by_prefix
+            self._stacks = {}
+        return True
+
+    def _open(self, index_path):
+        with self._lock:
+            stack = self._stacks.get(index_path)
+        if stack is not None:
+            return stack
+
+        try:
+            with open(index_path, "r", encoding="utf-8") as handle:
+                index = json.load(handle)
+            # The index names its own data file, so a rebuild can never
+            # pair it with another build's frames
+            data_path = os.path.join(FRAME_STACK_DIR, index["data"])
+            frames = np.memmap(data_path, dtype=np.uint8, mode="r")
+        except (OSError, ValueError, KeyError):
+            return None
+
+        for used_path in (index_path, data_path):
+            touch_cache_file(used_path)
+
+        positions = {name: i for i, name in enumerate(index["names"])}
+        stack = (index, positions, frames)
+        with self._lock:
+            self._stacks[index_path] = stack
+        return stack
+
+    def find(self, image_dir, name, max_width):
+        """(index, position, frames) of the stack holding a frame, or None."""
+        if not self._refresh():
+            return None
+
+        with self._lock:
+            candidates = self._by_prefix.get(
+                frame_stack_prefix(image_dir, max_width), ()
+            )
+        for index_path in candidates:
+            stack = self._open(index_path)
+            if stack is None:
+                continue
+            index, positions, frames = stack
+            i = positions.get(name)
+            if i is not None:
+                return index, i, frames
+        return None
+
+
+@st.cache_resource(show_spinner=False)
+def get_frame_stacks():
+    return FrameStackRegistry()
+
+
+def load_stacked_frame(path, stat, max_width, stacks):
+    image_dir, name = os.path.split(os.path.abspath(path))
+    found = stacks.find(image_dir, name, max_width)
+    if found is None:
+        return None
+
+    index, i, frames = found
+    if index["mtimes"][i] != stat.st_mtime_ns:
+        return None
+
+    # Zero-copy slice of the page-cached file
+    start = index["offsets"][i]
+    shape = tuple(index["shapes"][i])
+    if start + math.prod(shape) > len(frames):
+        return None
+    return frames[start:start + math.prod(shape)].reshape(shape)
+
+
+def build_frame_stack(case_imgs, view, max_width=MAX_DISPLAY_WIDTH):
+    image_dir = os.path.dirname(case_imgs[0][1])
+    index_path = frame_stack_index_path(image_dir, view, max_width)
+    os.makedirs(FRAME_STACK_DIR, exist_ok=True)
+
+    # Each build writes its own data file; it only becomes visible once
+    # the index naming it replaces the previous one
+    generation = f"{time.time_ns():x}.{threading.get_ident():x}"
+    data_name = os.path.basename(index_path)[:-len(".json")]
+    data_name = f"{data_name}.{generation}.bin"
+    data_path = os.path.join(FRAME_STACK_DIR, data_name)
+
+    cache = get_frame_cache()
+    stacks = get_frame_stacks()
+    index = {
+        "data": data_name, "names": [], "sort_keys": [], "mtimes": [],
+        "offsets": [], "shapes": [],
+    }
+
+    try:
+        with open(index_path, "r", encoding="utf-8") as handle:
+            previous_data = json.load(handle).get("data")
+    except (OSError, ValueError, AttributeError):
+        previous_data = None
+
+    def write_index(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(index, handle)
+
+    published = False
+    try:
+        offset = 0
+        with open(data_path, "wb") as handle:
+            for sort_key, path in case_imgs:
+                array = np.ascontiguousarray(
+                    load_and_resize_image(path, max_width, cache, stacks)
+                )
+                handle.write(array.tobytes())
+
+                index["names"].append(os.path.basename(path))
+                index["sort_keys"].append(sort_key)
+                index["mtimes"].append(os.stat(path).st_mtime_ns)
+                index["offsets"].append(offset)
+                index["shapes"].append(list(array.shape))
+                offset += array.nbytes
+
+        # Replacing the index is the only publish step
+        write_atomically(index_path, write_index)
+        published = True
+    finally:
+        if not published:
+            remove_quietly(data_path)
+
+    # Open memory maps keep the old data readable until they are dropped
+    if previous_data and previous_data != data_name:
+        remove_quietly(os.path.join(FRAME_STACK_DIR, previous_data))
+
+
+# ---------------- BOUNDED-MEMORY DECODE ----------------
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Bytes per pixel of the 8-bit PNG colour types read band by band
+PNG_BAND_BYTES_PER_PIXEL = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+class ImageTooLargeError(ValueError):
+    """Raised when an image cannot be reduced within DECODE_MEMORY_LIMIT."""
+
+
+def estimated_decode_bytes(src):
+    # Decoded buffer in the source mode plus the RGB copy made by convert()
+    return src.width * src.height * (len(src.getbands()) + 3)
+
+
+def _raw_row_strips(src):
+    # Uncompressed full-width strips (BMP, PPM, plain TIFF) can be read at
+    # any row offset; everything else has to be decoded in one piece.
+    strips = []
+    for tile in src.tile:
+        codec, extents, offset, args = tile[:4]
+        if codec != "raw" or extents[0] != 0 or extents[2] != src.width:
+            return None
+
+        if isinstance(args, str):
+            args = (args,)
+        rawmode = args[0]
+        stride = args[1] if len(args) > 1 and args[1] else 0
+        orientation = args[2] if len(args) > 2 else 1
+        if not stride:
+            row = Image.new(src.mode, (src.width, 1))
+            stride = len(row.tobytes("raw", rawmode))
+
+        strips.append(
+            (extents[1], extents[3], offset, rawmode, stride, orientation)
+        )
+    return strips
+
+
+def _read_strip_rows(handle, src, strip, first, last):
+    top, bottom, offset, rawmode, stride, orientation = strip
+    if orientation < 0:
+        # Bottom-up storage: the band ends where row `first` is stored
+        handle.seek(offset + (bottom - top - last) * stride)
+    else:
+        handle.seek(offset + first * stride)
+
+    data = handle.read((last - first) * stride)
+    if len(data) < (last - first) * stride:
+        raise OSError("image file is truncated")
+    band = Image.frombuffer(
+        src.mode, (src.width, last - first), data,
+        "raw", rawmode, stride, orientation,
+    )
+    if src.mode == "P":
+        band.putpalette(src.getpalette())
+    return band.convert("RGB")
+
+
+def _read_png_layout(handle):
+    """IHDR fields and PLTE data; leaves the handle at the first IDAT."""
+    if handle.read(8) != PNG_SIGNATURE:
+        raise ValueError("not a PNG file")
+
+    header = palette = None
+    while True:
+        length, chunk_type = struct.unpack(">I4s", handle.read(8))
+        if chunk_type == b"IDAT":
+            handle.seek(-8, os.SEEK_CUR)
+            return header, palette
+        if chunk_type == b"IEND":
+            raise ValueError("PNG file has no image data")
+
+        data = handle.read(length)
+        handle.seek(4, os.SEEK_CUR)
+        if chunk_type == b"IHDR":
+            header = struct.unpack(">IIBBBBB", data)
+        elif chunk_type == b"PLTE":
+            palette = data
+
+
+def _png_idat_pieces(handle, piece_size=1 << 20):
+    while True:
+        chunk_header = handle.read(8)
+        if len(chunk_header) < 8:
+            return
+        length, chunk_type = struct.unpack(">I4s", chunk_header)
+        if chunk_type == b"IEND":
+            return
+        if chunk_type != b"IDAT":
+            handle.seek(length + 4, os.SEEK_CUR)
             continue
 
-        dataset[case] = {}
-        files = [
-            f for f in os.listdir(path)
-            if f.lower().endswith((".png", ".jpg", ".jpeg"))
-        ]
+        remaining = length
+        while remaining:
+            piece = handle.read(min(piece_size, remaining))
+            if not piece:
+                return
+            remaining -= len(piece)
+            yield piece
+        handle.seek(4, os.SEEK_CUR)
+
+
+def _png_filtered_bands(handle, row_length, band_rows):
+    # max_length keeps a highly compressible stream from inflating past
+    # one band; the rest waits in unconsumed_tail
+    band_length = band_rows * row_length
+    inflater = zlib.decompressobj()
+    pending = bytearray()
+    for data in _png_idat_pieces(handle):
+        while data:
+            pending += inflater.decompress(data, band_length - len(pending))
+            data = inflater.unconsumed_tail
+            if len(pending) == band_length:
+                yield bytes(pending)
+                pending.clear()
+
+    pending += inflater.flush()
+    complete = len(pending) - len(pending) % row_length
+    for first in range(0, complete, band_length):
+        yield bytes(pending[first:min(first + band_length, complete)])
+
+
+def _decode_png_band(header, palette, seed_row, filtered):
+    """Decode one band of filtered scanlines through PIL.
+
+    Up, Average and Paeth rows refer to the row above, so the last row of
+    the previous band is prepended unfiltered and dropped again after.
+    """
+    width, _, bit_depth, color_type = header[:4]
+    stride = width * PNG_BAND_BYTES_PER_PIXEL[color_type]
+    rows = len(filtered) // (stride + 1)
+    if seed_row is not None:
+        filtered = b"\x00" + seed_row + filtered
+        rows += 1
+
+    buffer = io.BytesIO()
+    buffer.write(PNG_SIGNATURE)
+    write_png_chunk(buffer, b"IHDR", struct.pack(
+        ">IIBBBBB", width, rows, bit_depth, color_type, 0, 0, 0
+    ))
+    if palette is not None:
+        write_png_chunk(buffer, b"PLTE", palette)
+    # Stored blocks: the data is only round-tripped through PIL's decoder
+    write_png_chunk(buffer, b"IDAT", zlib.compress(filtered, 0))
+    write_png_chunk(buffer, b"IEND", b"")
+    buffer.seek(0)
+
+    with Image.open(buffer) as band:
+        band.load()
+        last_row = np.asarray(band)[-1].tobytes()
+        rgb = band.convert("RGB")
+    if seed_row is not None:
+        rgb = rgb.crop((0, 1, width, rows))
+    return rgb, last_row
+
+
+def band_span(top, rows, out_h, height):
+    # Output rows [y0, y1) covered by source rows [top, top + rows)
+    return round(top * out_h / height), round((top + rows) * out_h / height)
+
+
+def _png_band_layout(path):
+    """IHDR and PLTE of a PNG that can be read band by band, else None."""
+    with open(path, "rb") as handle:
+        try:
+            header, palette = _read_png_layout(handle)
+        except (ValueError, struct.error):
+            return None
+
+    # 16-bit, sub-byte and interlaced files have no band decoder
+    _, _, bit_depth, color_type, _, _, interlace = header
+    if (
+        bit_depth != 8 or interlace
+        or color_type not in PNG_BAND_BYTES_PER_PIXEL
+    ):
+        return None
+    return header, palette
+
+
+def _iter_png_bands(path, header, palette, reduce_rows):
+    width, _, _, color_type = header[:4]
+    stride = width * PNG_BAND_BYTES_PER_PIXEL[color_type]
+    # Inflated, re-wrapped and decoded copies plus PIL's RGB buffers
+    row_bytes = 4 * (stride + 1) + width * 11
+    band_rows = max(
+        1, DECODE_MEMORY_LIMIT // row_bytes // reduce_rows
+    ) * reduce_rows
+
+    with open(path, "rb") as handle:
+        _read_png_layout(handle)
+        top, seed_row = 0, None
+        for filtered in _png_filtered_bands(handle, stride + 1, band_rows):
+            band, seed_row = _decode_png_band(
+                header, palette, seed_row, filtered
+            )
+            yield top, band
+            top += band.height
+
+
+def _iter_strip_bands(path, src, strips):
+    row_bytes = max(strip[4] for strip in strips) + src.width * 3 * 2
+    # A single row per band still covers every output row, only with a
+    # coarser vertical filter
+    band_rows = max(1, DECODE_MEMORY_LIMIT // row_bytes)
+
+    with open(path, "rb") as handle:
+        for strip in strips:
+            top, bottom = strip[0], strip[1]
+            for first in range(0, bottom - top, band_rows):
+                last = min(first + band_rows, bottom - top)
+                yield top + first, _read_strip_rows(
+                    handle, src, strip, first, last
+                )
+
+
+def iter_source_bands(path, src, reduce_rows=1):
+    """RGB row bands (top, image) of an open image, within the memory limit.
+
+    Bands hold a multiple of reduce_rows rows where the budget allows.
+    Images that fit are returned as one band; larger ones without a band
+    decoder raise ImageTooLargeError.
+    """
+    if estimated_decode_bytes(src) <= DECODE_MEMORY_LIMIT:
+        return iter([(0, src.convert("RGB"))])
+
+    if src.format == "PNG":
+        layout = _png_band_layout(path)
+        if layout is not None:
+            return _iter_png_bands(path, *layout, reduce_rows)
+    else:
+        strips = _raw_row_strips(src)
+        if strips:
+            return _iter_strip_bands(path, src, strips)
+
+    # No band decoder: 16-bit, sub-byte or interlaced PNG, compressed
+    # TIFF, or a JPEG still too large after draft
+    raise ImageTooLargeError(
+        f"{os.path.basename(path)} ({src.width}×{src.height} "
+        f"{src.format}) cannot be decoded within the memory limit"
+    )
+
 
-        for f in files:
-            meta = parse_metadata(f)
-            view = meta["view"]
+def check_bands_complete(covered, height):
+    # A short stream would otherwise leave rows uninitialised
+    if covered != height:
+        raise OSError(
+            f"image file is truncated ({covered} of {height} rows)"
+        )
 
-            if view not in dataset[case]:
-                dataset[case][view] = []
 
-            full_path = os.path.join(path, f)
-            dataset[case][view].append((meta["sort_key"], full_path))
+def decode_in_bands(path, src, max_width):
+    """Box-filter an image into its display size one band at a time."""
+    width, height = src.size
+    out_w = min(max_width, width)
+    out_h = max(1, int(height * out_w / width))
+    output = np.empty((out_h, out_w, 3), dtype=np.uint8)
+
+    covered = 0
+    for top, band in iter_source_bands(
+        path, src, reduce_rows=math.ceil(height / out_h)
+    ):
+        y0, y1 = band_span(top, band.height, out_h, height)
+        if y1 > y0:
+            output[y0:y1] = np.asarray(
+                band.resize((out_w, y1 - y0), Image.Resampling.BOX)
+            )
+        covered = top + band.height
 
-        for view in dataset[case]:
-            dataset[case][view].sort(key=lambda x: x[0])
+    check_bands_complete(covered, height)
+    return output
 
-    return dataset
+
+def placeholder_frame(message, max_width=MAX_DISPLAY_WIDTH):
+    img = Image.new("RGB", (max_width, max_width * 9 // 16), (40, 40, 40))
+    ImageDraw.Draw(img).text((20, 20), message, fill=(230, 230, 230))
+    return np.array(img)
 
 
 # ---------------- LOAD + RESIZE ----------------
-def load_and_resize_image(path):
-    img = Image.open(path).convert("RGB")
+def display_size(width, height, max_width=MAX_DISPLAY_WIDTH):
+    if width > max_width:
+        return max_width, int(height * (max_width / float(width)))
+    return width, height
+
+
+def decode_and_resize(path, max_width=MAX_DISPLAY_WIDTH):
+    with Image.open(path) as src:
+        if src.format == "JPEG" and src.width > max_width:
+            # Let libjpeg scale by 1/2, 1/4 or 1/8 during the DCT decode
+            # so the full-resolution pixels are never materialised.
+            draft_height = math.ceil(src.height * max_width / src.width)
+            src.draft("RGB", (max_width, draft_height))
+
+        if estimated_decode_bytes(src) > DECODE_MEMORY_LIMIT:
+            return decode_in_bands(path, src, max_width)
 
-    if img.width > MAX_DISPLAY_WIDTH:
-        ratio = MAX_DISPLAY_WIDTH / float(img.width)
-        new_height = int(img.height * ratio)
+        img = src.convert("RGB")
+
+    if img.width > max_width:
         img = img.resize(
-            (MAX_DISPLAY_WIDTH, new_height),
+            display_size(img.width, img.height, max_width),
             Image.Resampling.BILINEAR,
         )
 
     return np.array(img)
 
 
-# ---------------- GRID CREATOR ----------------
-def create_combined_grid(images_dict, cols=3):
-    pil_images = [Image.fromarray(img) for img in images_dict.values()]
-    if not pil_images:
+def load_and_resize_image(
+    path, max_width=MAX_DISPLAY_WIDTH, cache=None, stacks=None
+):
+    # Resolve shared resources on the script thread and pass them to workers
+    if cache is None:
+        cache = get_frame_cache()
+    if stacks is None:
+        stacks = get_frame_stacks()
+
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, max_width)
+
+    array = cache.get(key)
+    if array is not None:
+        return array
+
+    if FRAME_STACK_DIR is not None:
+        array = load_stacked_frame(path, stat, max_width, stacks)
+        if array is not None:
+            return array
+
+    cache_path = None
+    if PREVIEW_CACHE_DIR is not None:
+        cache_path = preview_cache_path(path, stat, max_width)
+        array = read_cached_preview(cache_path)
+
+    if array is None:
+        try:
+            array = decode_and_resize(path, max_width)
+        except ImageTooLargeError as exc:
+            # Not written to disk, so raising the limit takes effect
+            array = placeholder_frame(str(exc), max_width)
+        else:
+            if cache_path is not None:
+                write_cached_preview(cache_path, array)
+
+    # Frames are shared between sessions, so hand out read-only views
+    array.flags.writeable = False
+    return cache.put(key, array)
+
+
+@st.cache_resource(show_spinner=False)
+def get_decode_pool():
+    return ThreadPoolExecutor(
+        max_workers=DECODE_WORKERS, thread_name_prefix="decode"
+    )
+
+
+def encode_frame(
+    path, image_format, quality, max_width, cache, stacks, encoded
+):
+    stat = os.stat(path)
+    key = (
+        os.path.abspath(path), stat.st_mtime_ns, max_width,
+        image_format, quality,
+    )
+
+    data = encoded.get(key)
+    if data is not None:
+        return data
+
+    array = load_and_resize_image(path, max_width, cache, stacks)
+
+    buffer = io.BytesIO()
+    Image.fromarray(array).save(buffer, format=image_format, quality=quality)
+    return encoded.put(key, buffer.getvalue())
+
+
+def encode_display_image(
+    path, max_width=MAX_DISPLAY_WIDTH, cache=None, stacks=None, encoded=None
+):
+    if encoded is None:
+        encoded = get_encoded_cache()
+    return encode_frame(
+        path, DISPLAY_FORMAT, DISPLAY_QUALITY,
+        max_width, cache, stacks, encoded,
+    )
+
+
+def lazy_download(path):
+    """Callable for st.download_button that encodes only when clicked.
+
+    Streamlit runs it off the script thread, so the shared caches are
+    resolved here and bound in. The result is served from the encoded
+    cache on later clicks by any session.
+    """
+    return functools.partial(
+        encode_frame, path, DOWNLOAD_FORMAT, None, MAX_DISPLAY_WIDTH,
+        get_frame_cache(), get_frame_stacks(), get_encoded_cache(),
+    )
+
+
+def mime_and_extension(image_format):
+    if image_format == "JPEG":
+        return "image/jpeg", "jpg"
+    return f"image/{image_format.lower()}", image_format.lower()
+
+
+def load_images_parallel(
+    paths_by_case, max_width=MAX_DISPLAY_WIDTH, encoded=False
+):
+    resources = [max_width, get_frame_cache(), get_frame_stacks()]
+    loader = load_and_resize_image
+    if encoded:
+        resources.append(get_encoded_cache())
+        loader = encode_display_image
+
+    pool = get_decode_pool()
+    futures = {
+        case: pool.submit(loader, path, *resources)
+        for case, path in paths_by_case.items()
+    }
+
+    # Collect in submission order so the grid keeps the case order
+    return {case: future.result() for case, future in futures.items()}
+
+
+# ---------------- FRAME MATCHING ----------------
+MATCH_POLICIES = ["Frame index", "Nearest time", "Floor time", "Exact time"]
+
+
+def match_frame(case_imgs, target_key, policy):
+    """Index of the frame matching target_key under policy, or None.
+
+    Binary search over the sorted key array, so O(log n) per case.
+    """
+    keys = case_imgs.keys
+    if len(keys) == 0:
         return None
 
-    rows = math.ceil(len(pil_images) / cols)
-    img_w, img_h = pil_images[0].size
+    if policy == "Floor time":
+        i = int(np.searchsorted(keys, target_key, side="right")) - 1
+        return i if i >= 0 else None
+
+    i = int(np.searchsorted(keys, target_key, side="left"))
+    if policy == "Exact time":
+        return i if i < len(keys) and keys[i] == target_key else None
+
+    if i == len(keys) or (
+        i > 0 and target_key - keys[i - 1] <= keys[i] - target_key
+    ):
+        return i - 1
+    return i
+
+
+def match_frames(dataset, cases, view, frame_index, policy):
+    # The slider walks the first case; others follow by index or by time
+    if policy == "Frame index":
+        return {
+            case: min(frame_index, len(dataset[case][view]) - 1)
+            if len(dataset[case][view]) else None
+            for case in cases
+        }
+
+    target_key = dataset[cases[0]][view].keys[frame_index]
+    return {
+        case: match_frame(dataset[case][view], target_key, policy)
+        for case in cases
+    }
+
+
+def frame_caption(case_imgs, idx, target_key):
+    key = case_imgs[idx][0]
+    if target_key is None:
+        return f"t = {key:g}"
+    return f"t = {key:g} (Δ {key - target_key:+g})"
+
+
+# ---------------- NEIGHBOUR PREFETCH ----------------
+@st.cache_resource(show_spinner=False)
+def get_prefetch_pool():
+    return ThreadPoolExecutor(
+        max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch"
+    )
 
-    grid_img = Image.new("RGB", (cols * img_w, rows * img_h), (20, 20, 20))
 
-    for idx, img in enumerate(pil_images):
-        row = idx // cols
-        col = idx % cols
-        grid_img.paste(img, (col * img_w, row * img_h))
+def _prefetch_frames(paths, cancel, cache, stacks, encoded):
+    for path in paths:
+        if cancel.is_set():
+            return
+        try:
+            encode_display_image(
+                path, MAX_DISPLAY_WIDTH, cache, stacks, encoded
+            )
+        except (OSError, ValueError):
+            continue
+
+
+def prefetch_neighbour_frames(dataset, cases, view, frame_index, policy):
+    # A newer slider position supersedes whatever is still queued
+    if st.session_state.prefetch_cancel is not None:
+        st.session_state.prefetch_cancel.set()
+
+    cancel = threading.Event()
+    st.session_state.prefetch_cancel = cancel
+
+    paths = []
+    master_len = len(dataset[cases[0]][view])
+    for distance in range(1, PREFETCH_RADIUS + 1):
+        for offset in (distance, -distance):
+            position = frame_index + offset
+            if not 0 <= position < master_len:
+                continue
+
+            matched = match_frames(dataset, cases, view, position, policy)
+            for case, idx in matched.items():
+                if idx is None:
+                    continue
+                path = dataset[case][view][idx][1]
+                if path not in paths:
+                    paths.append(path)
+
+    get_prefetch_pool().submit(
+        _prefetch_frames, paths, cancel,
+        get_frame_cache(), get_frame_stacks(), get_encoded_cache(),
+    )
+
 
+# ---------------- TILE PYRAMID ----------------
+def pyramid_dir(path):
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return os.path.join(TILE_CACHE_DIR, digest[:2], digest)
+
+
+def pyramid_level_count(width, height):
+    # Level 0 is native resolution; each level halves it until one tile fits
+    levels = 1
+    while max(width, height) > TILE_SIZE:
+        width, height = math.ceil(width / 2), math.ceil(height / 2)
+        levels += 1
+    return levels
+
+
+def level_size(width, height, level):
+    scale = 2 ** level
+    return math.ceil(width / scale), math.ceil(height / scale)
+
+
+def write_tile_row(level_dir, rows, tile_row):
+    for left in range(0, rows.shape[1], TILE_SIZE):
+        tile = Image.fromarray(rows[:, left:left + TILE_SIZE])
+        tile_path = os.path.join(
+            level_dir, f"{left // TILE_SIZE}_{tile_row}.png"
+        )
+        write_atomically(
+            tile_path,
+            lambda tmp_path: tile.save(
+                tmp_path, format="PNG", compress_level=1
+            ),
+        )
+
+
+def build_pyramid_level(path, level, tile_dir):
+    level_dir = os.path.join(tile_dir, str(level))
+    os.makedirs(level_dir, exist_ok=True)
+
+    with Image.open(path) as src:
+        level_w, level_h = level_size(src.width, src.height, level)
+        if src.format == "JPEG":
+            src.draft("RGB", (level_w, level_h))
+
+        # Bands from the same bounded decoder as the display path; only
+        # one row of tiles of the level is held at a time
+        height = src.height
+        pending, pending_rows, tile_row, covered = [], 0, 0, 0
+        for top, band in iter_source_bands(
+            path, src, reduce_rows=math.ceil(height / level_h)
+        ):
+            y0, y1 = band_span(top, band.height, level_h, height)
+            if y1 > y0:
+                pending.append(np.asarray(
+                    band.resize((level_w, y1 - y0), Image.Resampling.BOX)
+                ))
+                pending_rows += y1 - y0
+            covered = top + band.height
+
+            while pending_rows >= TILE_SIZE:
+                rows = np.concatenate(pending)
+                write_tile_row(level_dir, rows[:TILE_SIZE], tile_row)
+                pending = [rows[TILE_SIZE:]]
+                pending_rows -= TILE_SIZE
+                tile_row += 1
+
+        check_bands_complete(covered, height)
+        if pending_rows:
+            write_tile_row(level_dir, np.concatenate(pending), tile_row)
+
+    # The marker is written last, so a level is either complete or rebuilt
+    open(os.path.join(level_dir, "complete"), "w").close()
+
+
+def read_tiles(level_dir, tiles_x, tiles_y):
+    tiles = {}
+    for ty in tiles_y:
+        for tx in tiles_x:
+            tile_path = os.path.join(level_dir, f"{tx}_{ty}.png")
+            with Image.open(tile_path) as tile_img:
+                tiles[tx, ty] = np.asarray(tile_img.convert("RGB"))
+            touch_cache_file(tile_path)
+    return tiles
+
+
+def render_viewport(path, level, center_x, center_y):
+    with Image.open(path) as src:
+        width, height = src.size
+
+    tile_dir = pyramid_dir(path)
+    level_dir = os.path.join(tile_dir, str(level))
+    marker = os.path.join(level_dir, "complete")
+    if not os.path.exists(marker):
+        build_pyramid_level(path, level, tile_dir)
+    touch_cache_file(marker)
+
+    level_w, level_h = level_size(width, height, level)
+    view_w = min(INSPECTOR_VIEWPORT[0], level_w)
+    view_h = min(INSPECTOR_VIEWPORT[1], level_h)
+    left = int(round(center_x * (level_w - view_w)))
+    top = int(round(center_y * (level_h - view_h)))
+
+    viewport = np.zeros((view_h, view_w, 3), dtype=np.uint8)
+
+    # Only the tiles overlapping the viewport are read from disk
+    tiles_x = range(left // TILE_SIZE, (left + view_w - 1) // TILE_SIZE + 1)
+    tiles_y = range(top // TILE_SIZE, (top + view_h - 1) // TILE_SIZE + 1)
+    try:
+        tiles = read_tiles(level_dir, tiles_x, tiles_y)
+    except FileNotFoundError:
+        # Tiles pruned from a level still marked complete
+        build_pyramid_level(path, level, tile_dir)
+        tiles = read_tiles(level_dir, tiles_x, tiles_y)
+
+    for ty in tiles_y:
+        for tx in tiles_x:
+            tile = tiles[tx, ty]
+            tile_left, tile_top = tx * TILE_SIZE, ty * TILE_SIZE
+            x0, y0 = max(left, tile_left), max(top, tile_top)
+            x1 = min(left + view_w, tile_left + tile.shape[1])
+            y1 = min(top + view_h, tile_top + tile.shape[0])
+
+            viewport[y0 - top:y1 - top, x0 - left:x1 - left] = tile[
+                y0 - tile_top:y1 - tile_top, x0 - tile_left:x1 - tile_left
+            ]
+
+    return viewport, (width, height)
+
+
+def render_inspector(dataset, view_selection, frame_indices):
+    if TILE_CACHE_DIR is None:
+        return
+    if not st.checkbox("🔍 Inspect at native resolution"):
+        return
+
+    matched_cases = [
+        case for case, idx in frame_indices.items() if idx is not None
+    ]
+    if not matched_cases:
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    inspect_case = col1.selectbox("Case", matched_cases, key="inspect_case")
+
+    case_imgs = dataset[inspect_case][view_selection]
+    _, path = case_imgs[frame_indices[inspect_case]]
+
+    with Image.open(path) as src:
+        levels = pyramid_level_count(*src.size)
+
+    level = col2.select_slider(
+        "Zoom",
+        options=list(range(levels - 1, -1, -1)),
+        value=levels - 1,
+        format_func=lambda lvl: f"{100 / 2 ** lvl:g}%",
+    )
+    center_x = col3.slider("Pan X", 0.0, 1.0, 0.5)
+    center_y = col4.slider("Pan Y", 0.0, 1.0, 0.5)
+
+    try:
+        with st.spinner("Loading tiles..."):
+            viewport, (width, height) = render_viewport(
+                path, level, center_x, center_y
+            )
+    except ImageTooLargeError as exc:
+        st.warning(f"{exc}. Try a lower zoom level.")
+        return
+
+    st.caption(f"{os.path.basename(path)} — {width}×{height} px")
+    st.image(viewport)
+
+
+# ---------------- GRID CREATOR ----------------
+def fit_tile(tile, cell_w, cell_h, fit=GRID_FIT):
+    """Resize a tile for a cell; returns (array, x offset, y offset)."""
+    tile_h, tile_w = tile.shape[:2]
+    if fit == "stretch":
+        size = (cell_w, cell_h)
+    else:
+        scale = min(cell_w / tile_w, cell_h / tile_h)
+        size = (
+            max(1, min(cell_w, round(tile_w * scale))),
+            max(1, min(cell_h, round(tile_h * scale))),
+        )
+
+    if size != (tile_w, tile_h):
+        tile = np.asarray(
+            Image.fromarray(tile).resize(size, Image.Resampling.BILINEAR)
+        )
+    return tile, (cell_w - size[0]) // 2, (cell_h - size[1]) // 2
+
+
+def draw_tile_label(canvas, x, y, width, text):
+    # Only the label strip round-trips through PIL, not the whole canvas
+    strip_h = min(24, canvas.shape[0] - y)
+    strip = Image.fromarray(np.ascontiguousarray(
+        canvas[y:y + strip_h, x:x + width]
+    ))
+    draw = ImageDraw.Draw(strip)
+    draw.rectangle((0, 0, draw.textlength(text) + 12, strip_h), fill=(0, 0, 0))
+    draw.text((6, 6), text, fill=(255, 255, 255))
+    canvas[y:y + strip_h, x:x + width] = np.asarray(strip)
+
+
+def encode_canvas(canvas, image_format=GRID_EXPORT_FORMAT):
     buffer = io.BytesIO()
-    grid_img.save(buffer, format="PNG")
+    img = Image.fromarray(canvas)
+    if image_format == "PNG":
+        # Level 1 is several times faster than the default on big mosaics
+        img.save(buffer, format="PNG", compress_level=1)
+    else:
+        img.save(buffer, format=image_format, quality=90)
     buffer.seek(0)
     return buffer
 
 
-def create_blink_gif(img_a, img_b, duration=400, max_width=600):
-    pil_a = Image.fromarray(img_a).convert("RGB")
-    pil_b = Image.fromarray(img_b).convert("RGB")
+def grid_cell_size(images):
+    return (
+        max(img.shape[1] for img in images),
+        max(img.shape[0] for img in images),
+    )
 
-    # ----- Create shared palette -----
-    combined = Image.new(
-        "RGB",
-        (pil_a.width, pil_a.height * 2)
+
+def iter_grid_bands(images_dict, cols=3, labels=False, fit=GRID_FIT):
+    """Yield the grid one row of cells at a time as uint8 bands."""
+    cell_w, cell_h = grid_cell_size(list(images_dict.values()))
+    items = list(images_dict.items())
+
+    for start in range(0, len(items), cols):
+        band = np.empty((cell_h, cols * cell_w, 3), dtype=np.uint8)
+        band[:] = GRID_BACKGROUND
+        for col, (name, img) in enumerate(items[start:start + cols]):
+            x = col * cell_w
+            tile, dx, dy = fit_tile(img, cell_w, cell_h, fit)
+            band[dy:dy + tile.shape[0], x + dx:x + dx + tile.shape[1]] = tile
+            if labels:
+                draw_tile_label(band, x, 0, cell_w, str(name))
+        yield band
+
+
+def compose_grid(images_dict, cols=3, labels=False, fit=GRID_FIT):
+    """Write tiles straight into one preallocated uint8 canvas."""
+    if not images_dict:
+        return None
+
+    cell_w, cell_h = grid_cell_size(list(images_dict.values()))
+    rows = math.ceil(len(images_dict) / cols)
+
+    canvas = np.empty((rows * cell_h, cols * cell_w, 3), dtype=np.uint8)
+    for row, band in enumerate(
+        iter_grid_bands(images_dict, cols=cols, labels=labels, fit=fit)
+    ):
+        canvas[row * cell_h:(row + 1) * cell_h] = band
+    return canvas
+
+
+def write_png_chunk(fileobj, chunk_type, data):
+    fileobj.write(struct.pack(">I", len(data)))
+    fileobj.write(chunk_type)
+    fileobj.write(data)
+    fileobj.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunk_type))))
+
+
+def write_png_stream(fileobj, width, height, bands, compress_level=1):
+    """
+    Encode an RGB image to PNG from an iterable of row bands.
+
+    Each band is filtered and fed through one zlib stream as its own IDAT
+    chunk, so only a single band is ever held uncompressed.
+    """
+    fileobj.write(PNG_SIGNATURE)
+    write_png_chunk(
+        fileobj, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    )
+
+    compressor = zlib.compressobj(compress_level)
+    for band in bands:
+        # Every scanline is prefixed with filter type 0 (None)
+        scanlines = np.zeros((band.shape[0], width * 3 + 1), dtype=np.uint8)
+        scanlines[:, 1:] = band.reshape(band.shape[0], -1)
+        data = compressor.compress(scanlines)
+        if data:
+            write_png_chunk(fileobj, b"IDAT", data)
+    write_png_chunk(fileobj, b"IDAT", compressor.flush())
+    write_png_chunk(fileobj, b"IEND", b"")
+
+
+def create_combined_grid(
+    images_dict, cols=3, labels=False, image_format=GRID_EXPORT_FORMAT
+):
+    if not images_dict:
+        return None
+
+    if image_format != "PNG":
+        # PIL has no incremental JPEG encoder, so other formats go in one piece
+        return encode_canvas(
+            compose_grid(images_dict, cols=cols, labels=labels), image_format
+        )
+
+    cell_w, cell_h = grid_cell_size(list(images_dict.values()))
+    rows = math.ceil(len(images_dict) / cols)
+
+    # Spill to disk so concurrent exports don't each pin a full PNG in RAM;
+    # unbuffered so st.download_button accepts it as a raw file
+    output = tempfile.TemporaryFile(buffering=0)
+    write_png_stream(
+        output,
+        cols * cell_w,
+        rows * cell_h,
+        iter_grid_bands(images_dict, cols=cols, labels=labels),
     )
-    combined.paste(pil_a, (0, 0))
-    combined.paste(pil_b, (0, pil_a.height))
+    output.seek(0)
+    return output
 
-    palette_image = combined.convert(
-        "P",
-        palette=Image.ADAPTIVE,
-        colors=256
+
+def fit_width(img, max_width):
+    pil_img = Image.fromarray(img).convert("RGB")
+    if pil_img.width > max_width:
+        pil_img = pil_img.resize(
+            display_size(pil_img.width, pil_img.height, max_width),
+            Image.Resampling.BILINEAR,
+        )
+    return np.asarray(pil_img)
+
+
+def shared_palette(frames, samples=BLINK_PALETTE_SAMPLES):
+    """Fit a 256-colour median-cut palette on a subsample of all frames."""
+    pixels = np.concatenate([frame.reshape(-1, 3) for frame in frames])
+    step = max(1, len(pixels) // samples)
+    sample = np.ascontiguousarray(pixels[::step])
+
+    quantized = Image.fromarray(sample[:, None, :]).quantize(
+        256, method=Image.Quantize.MEDIANCUT
     )
+    palette = np.array(quantized.getpalette(), dtype=np.uint8).reshape(-1, 3)
+    return palette[:256]
+
+
+@functools.lru_cache(maxsize=1)
+def _lut_cell_centres():
+    # Centre colour of every 5-bit-per-channel RGB cell
+    levels = np.arange(32, dtype=np.float32) * 8 + 4
+    r, g, b = np.meshgrid(levels, levels, levels, indexing="ij")
+    return np.stack([r.ravel(), g.ravel(), b.ravel()], axis=1)
+
+
+def palette_lut(palette):
+    """Nearest palette index for each of the 32768 5-bit RGB cells."""
+    centres = _lut_cell_centres()
+    colours = palette.astype(np.float32)
+    # |c - p|^2 without the constant |c|^2 term
+    distances = (colours ** 2).sum(axis=1) - 2 * centres @ colours.T
+    return distances.argmin(axis=1).astype(np.uint8)
+
+
+def apply_palette_lut(frame, lut):
+    rgb = frame.astype(np.uint16) >> 3
+    cells = (rgb[..., 0] << 10) | (rgb[..., 1] << 5) | rgb[..., 2]
+    return lut[cells]
+
+
+def create_blink_gif(
+    img_a, img_b, duration=BLINK_GIF_DURATION, max_width=BLINK_GIF_WIDTH
+):
+    frame_a = fit_width(img_a, max_width)
+    frame_b = fit_width(img_b, max_width)
+    if frame_b.shape != frame_a.shape:
+        frame_b = np.asarray(
+            Image.fromarray(frame_b).resize(
+                (frame_a.shape[1], frame_a.shape[0]),
+                Image.Resampling.BILINEAR,
+            )
+        )
 
-    # Apply SAME palette to both frames
-    pil_a_p = pil_a.quantize(palette=palette_image)
-    pil_b_p = pil_b.quantize(palette=palette_image)
+    # ----- Shared palette, mapped through a lookup table -----
+    palette = shared_palette([frame_a, frame_b])
+    lut = palette_lut(palette)
 
     frames = []
-    for _ in range(6):
-        frames.append(pil_a_p)
-        frames.append(pil_b_p)
+    for frame in (frame_a, frame_b):
+        indexed = Image.fromarray(apply_palette_lut(frame, lut), mode="P")
+        indexed.putpalette(palette.ravel().tolist())
+        frames.append(indexed)
 
+    # Two frames with loop=0 repeat forever; disposal=1 lets the second
+    # frame be stored as just the region that differs from the first
     buffer = io.BytesIO()
     frames[0].save(
         buffer,
@@ -157,25 +2120,65 @@ def create_blink_gif(img_a, img_b, duration=400, max_width=600):
         duration=duration,
         loop=0,
         optimize=False,
-        disposal=2,
+        disposal=1,
     )
 
     buffer.seek(0)
     return buffer
 
 
+def blink_gif_key(
+    case_a, case_b, variable, view, frames,
+    duration=BLINK_GIF_DURATION, max_width=BLINK_GIF_WIDTH,
+):
+    """Cache key for a blink GIF; `frames` holds one (key, path) per case.
+
+    Source mtimes are part of the key, so a rewritten frame never serves
+    a stale animation.
+    """
+    sources = tuple(
+        (frame_key, os.path.abspath(path), os.stat(path).st_mtime_ns)
+        for frame_key, path in frames
+    )
+    return (
+        "blink", case_a, case_b, variable, view, sources, duration, max_width,
+    )
+
+
+def cached_blink_gif(key, artefacts=None):
+    if artefacts is None:
+        artefacts = get_artefact_cache()
+    return artefacts.get(key)
+
+
+def build_blink_gif(
+    key, path_a, path_b,
+    duration=BLINK_GIF_DURATION, max_width=BLINK_GIF_WIDTH, artefacts=None,
+):
+    if artefacts is None:
+        artefacts = get_artefact_cache()
+
+    gif_buffer = create_blink_gif(
+        load_and_resize_image(path_a),
+        load_and_resize_image(path_b),
+        duration=duration,
+        max_width=max_width,
+    )
+    return artefacts.put(key, gif_buffer.getvalue())
+
+
 def main():
     st.title("CFD Case Viewer")
+    prune_disk_caches()
 
     # ===== SIDEBAR =====
     with st.sidebar:
         st.header("Job Selection")
 
+        st.button("🔄 Refresh Listings", on_click=refresh_listings)
+
         base_path = OPENFOAM_BASE_DIR if os.path.exists(OPENFOAM_BASE_DIR) else "."
-        available_jobs = sorted(
-            [d for d in os.listdir(base_path)
-             if os.path.isdir(os.path.join(base_path, d))]
-        )
+        available_jobs = list_jobs(base_path)
 
         selected_job = st.selectbox(
             "Select Job / Run",
@@ -189,11 +2192,7 @@ def main():
 
         cases_root_path = os.path.join(base_path, selected_job, "CASES")
 
-        all_cases = sorted(
-            [d for d in os.listdir(cases_root_path)
-             if os.path.isdir(os.path.join(cases_root_path, d))
-             and d.isdigit() and len(d) == 3]
-        )
+        all_cases = list_cases(cases_root_path)
 
         st.header("Configuration")
 
@@ -226,10 +2225,7 @@ def main():
             cases_root_path, master_case, "postProcessing", "images"
         )
 
-        avail_vars = sorted(
-            [d for d in os.listdir(img_path)
-             if os.path.isdir(os.path.join(img_path, d))]
-        )
+        avail_vars = list_variables(img_path)
 
         variable = st.selectbox(
             "Variable",
@@ -251,6 +2247,15 @@ def main():
                 st.stop()
 
     # ===== LOAD METADATA =====
+    # Generations are read first so any change during the load triggers
+    # another live refresh rather than being missed.
+    watcher = get_metadata_watcher()
+    image_dirs = [
+        case_image_dir(cases_root_path, case, variable)
+        for case in selected_cases
+    ]
+    generations = [watcher.generation(path) for path in image_dirs]
+
     dataset = load_image_metadata(
         cases_root_path, selected_cases, variable
     )
@@ -283,8 +2288,32 @@ def main():
                 "Frame Position", 0, len(master_images) - 1, 0
             )
 
+        match_policy = st.selectbox("Frame Matching", MATCH_POLICIES)
+
+        follow_live = st.checkbox("🔴 Follow live run")
+
+        if FRAME_STACK_DIR is not None and st.button("📦 Pack Frame Stacks"):
+            with st.spinner("Packing frames..."):
+                for case in selected_cases:
+                    build_frame_stack(
+                        dataset[case][view_selection], view_selection
+                    )
+
+    if follow_live:
+        follow_live_run(image_dirs, generations)
+
+    frame_indices = match_frames(
+        dataset, selected_cases, view_selection, frame_index, match_policy
+    )
+    target_key = None
+    if match_policy != "Frame index":
+        target_key = master_images[frame_index][0]
+
     st.markdown("### Visualization")
 
+    if target_key is not None:
+        st.caption(f"Target time: {target_key:g} ({match_policy.lower()})")
+
     # =======================
     # BLINK MODE (Instant)
     # =======================
@@ -292,21 +2321,15 @@ def main():
 
         case_a, case_b = selected_cases
 
-        cache_key = (case_a, case_b, view_selection, frame_index)
-
-        if cache_key not in st.session_state.blink_cache:
-
-            blink_images = {}
-
-            for case in selected_cases:
-                case_imgs = dataset[case][view_selection]
-                idx = min(frame_index, len(case_imgs) - 1)
-                _, path = case_imgs[idx]
-                blink_images[case] = load_and_resize_image(path)
-
-            st.session_state.blink_cache[cache_key] = blink_images
+        missing = [c for c in selected_cases if frame_indices[c] is None]
+        if missing:
+            st.warning(f"No frame of case {', '.join(missing)} matches.")
+            return
 
-        blink_images = st.session_state.blink_cache[cache_key]
+        blink_frames = {
+            case: dataset[case][view_selection][frame_indices[case]]
+            for case in selected_cases
+        }
 
         if st.session_state.active_blink_case is None:
             st.session_state.active_blink_case = case_a
@@ -327,21 +2350,39 @@ def main():
         active_case = st.session_state.active_blink_case
 
         st.subheader(f"Active: {active_case}")
-        st.image(blink_images[active_case], use_container_width=True)
+        st.caption(frame_caption(
+            dataset[active_case][view_selection],
+            frame_indices[active_case], target_key,
+        ))
+        st.image(
+            encode_display_image(blink_frames[active_case][1]),
+            width="stretch",
+            output_format=DISPLAY_FORMAT,
+        )
 
-        if generate_gif:
-            gif_buffer = create_blink_gif(
-                blink_images[case_a],
-                blink_images[case_b],
+        gif_key = blink_gif_key(
+            case_a, case_b, variable, view_selection,
+            [blink_frames[case_a], blink_frames[case_b]],
+        )
+        gif_data = cached_blink_gif(gif_key)
+        if gif_data is None and generate_gif:
+            gif_data = build_blink_gif(
+                gif_key, blink_frames[case_a][1], blink_frames[case_b][1]
             )
 
+        # Shown straight away when any session already built this pair
+        if gif_data is not None:
             st.download_button(
                 "⬇ Download Blink GIF",
-                gif_buffer,
+                gif_data,
                 f"blink_{case_a}_{case_b}.gif",
                 "image/gif",
             )
 
+        prefetch_neighbour_frames(
+            dataset, selected_cases, view_selection, frame_index,
+            match_policy,
+        )
         return
 
     # =======================
@@ -349,62 +2390,100 @@ def main():
     # =======================
     if mode == "Side-by-Side":
 
-        images = {}
-        for case in selected_cases:
+        cols = st.columns(len(selected_cases))
+        for i, case in enumerate(selected_cases):
             case_imgs = dataset[case][view_selection]
-            idx = min(frame_index, len(case_imgs) - 1)
-            _, path = case_imgs[idx]
-            images[case] = load_and_resize_image(path)
-
-        cols = st.columns(len(images))
-        for i, case in enumerate(images):
+            idx = frame_indices[case]
             with cols[i]:
                 st.subheader(case)
-                st.image(images[case], use_container_width=True)
+                if idx is None:
+                    st.info("No matching frame")
+                    continue
+
+                _, path = case_imgs[idx]
+                st.caption(frame_caption(case_imgs, idx, target_key))
+                st.image(
+                    encode_display_image(path),
+                    width="stretch",
+                    output_format=DISPLAY_FORMAT,
+                )
 
     # =======================
     # GRID MODE
     # =======================
     if mode == "Grid View":
 
-        images = {}
+        paths, infos = {}, []
         for case in selected_cases:
             case_imgs = dataset[case][view_selection]
-            idx = min(frame_index, len(case_imgs) - 1)
-            _, path = case_imgs[idx]
-            images[case] = load_and_resize_image(path)
+            idx = frame_indices[case]
+            if idx is None:
+                continue
+            _, paths[case] = case_imgs[idx]
+            infos.append(case_imgs.frame_info(idx))
+
+        images = load_images_parallel(paths, encoded=True)
+        mime, extension = mime_and_extension(DOWNLOAD_FORMAT)
 
         cols = 3
         grid_columns = st.columns(cols)
 
-        for i, case in enumerate(images):
+        for i, case in enumerate(selected_cases):
             with grid_columns[i % cols]:
                 st.subheader(case)
-                st.image(images[case], use_container_width=True)
-
-                buffer = io.BytesIO()
-                Image.fromarray(images[case]).save(buffer, format="PNG")
-                buffer.seek(0)
+                if case not in images:
+                    st.info("No matching frame")
+                    continue
+
+                st.caption(frame_caption(
+                    dataset[case][view_selection],
+                    frame_indices[case], target_key,
+                ))
+                st.image(
+                    images[case],
+                    width="stretch",
+                    output_format=DISPLAY_FORMAT,
+                )
 
                 st.download_button(
                     "⬇ Download Image",
-                    buffer,
-                    f"{case}.png",
-                    "image/png",
+                    lazy_download(paths[case]),
+                    f"{case}.{extension}",
+                    mime,
                     key=f"dl_{case}",
+                    on_click="ignore",
                 )
 
         st.markdown("---")
 
-        if st.button("⬇ Download Combined Grid"):
-            grid_buffer = create_combined_grid(images, cols=cols)
+        # Probed headers give the mosaic size before anything is decoded
+        if infos and all(infos):
+            sizes = [display_size(w, h) for w, h, _ in infos]
+            grid_w = cols * max(w for w, _ in sizes)
+            grid_h = math.ceil(len(sizes) / cols) * max(h for _, h in sizes)
+            st.caption(
+                f"Combined grid: {grid_w}×{grid_h} px, "
+                f"~{grid_w * grid_h * 3 / 2 ** 20:.0f} MB uncompressed"
+            )
+
+        if paths and st.button("⬇ Download Combined Grid"):
+            grid_buffer = create_combined_grid(
+                load_images_parallel(paths), cols=cols, labels=True
+            )
+            grid_mime, grid_extension = mime_and_extension(GRID_EXPORT_FORMAT)
             st.download_button(
                 "Download Grid Image",
                 grid_buffer,
-                "combined_grid.png",
-                "image/png",
+                f"combined_grid.{grid_extension}",
+                grid_mime,
             )
 
+    render_inspector(dataset, view_selection, frame_indices)
+
+    prefetch_neighbour_frames(
+        dataset, selected_cases, view_selection, frame_index, match_policy
+    )
+
 
 if __name__ == "__main__":
     main()